@@ -1,17 +1,40 @@
-import json
 import logging
 
+from collections import OrderedDict
+import mmap
+import os
+from functools import lru_cache
+import queue
+import threading
 import time
-from datetime import datetime, timedelta
-import concurrent.futures
+from urllib.parse import quote, quote_plus
+
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from sdk_classes.metaclass import SingletonMeta
+from sdk_classes.weather_entry import WeatherEntry
 
 
 class OpenWeatherMap(metaclass=SingletonMeta):
     __ON_DEMAND = "on_demand"
     __POLLING = "polling"
+    _URL_PREFIX = "https://api.openweathermap.org/data/2.5/weather?q="
+    _GROUP_URL_PREFIX = "https://api.openweathermap.org/data/2.5/group?id="
+    _GROUP_LIMIT = 20
+    _TTL_SECONDS = 60 * 10
+    _ERROR_MESSAGES = {
+        401: "Error 401: Unauthorized API request",
+        404: "Error 404: City not found or incorrect API request format",
+        429: "Error 429: Too many requests, consider upgrading your subscription or reducing API calls",
+        500: "Error 500: Server error, please contact support",
+        502: "Error 502: Server error, please contact support",
+        503: "Error 503: Server error, please contact support",
+        504: "Error 504: Server error, please contact support",
+    }
+    _session = None
 
     def __init__(self, api_key: str, mode: str) -> None:
         """
@@ -25,18 +48,27 @@ class OpenWeatherMap(metaclass=SingletonMeta):
 
         Attributes:
             api_key (str): Your OpenWeather API key.
-            file_name (str): The filename to store cache data.
-            _cache (dict): A dictionary to store cached weather data.
+            file_name (str): The filename to store cache data, one JSON line per cache update.
             cache_limit (int): The maximum number of cached entries.
+            _cache (OrderedDict): A dictionary to store cached weather data, least recently used city first.
+                Each city maps to a WeatherEntry with the update time in Unix seconds and the weather data.
+            _cache_lines (int): The number of lines currently written to the cache file.
+            _cache_lock (threading.Lock): Guards adding, updating and evicting cached cities across threads.
             mode (str): The mode of operation for the API client. Either 'polling' or 'on_demand'.
+            _stop_polling (threading.Event): Signals the polling thread to stop.
+            _polling_thread (threading.Thread or None): Background thread updating the cache in 'polling' mode.
+            _write_queue (queue.Queue): Cache entries waiting to be written to the cache file.
+            _writer_thread (threading.Thread): Background thread writing queued cache entries to the cache file.
 
         Raises:
             ValueError: If the `mode` is not 'polling' or 'on_demand'.
         """
         self.api_key = api_key
-        self.file_name = "weather_cache.json"
-        self._cache = self._load_cache()
+        self.file_name = "weather_cache.ndjson"
         self.cache_limit = 10
+        self._cache_lines = 0
+        self._cache = self._load_cache()
+        self._cache_lock = threading.Lock()
 
         # Ensure only one mode is active (concise error message)
         if mode not in [self.__ON_DEMAND, self.__POLLING]:
@@ -48,8 +80,22 @@ class OpenWeatherMap(metaclass=SingletonMeta):
             )
 
         self.mode = mode
+        self._write_queue = queue.Queue()
+        self._writer_thread = threading.Thread(
+            target=self._write_cache_thread,
+            name=f"{self.__class__.__name__}-writer",
+            daemon=True,
+        )
+        self._writer_thread.start()
+        self._stop_polling = threading.Event()
+        self._polling_thread = None
         if self.mode == self.__POLLING:
-            self._update_weather_thread()
+            self._polling_thread = threading.Thread(
+                target=self._update_weather_thread,
+                name=f"{self.__class__.__name__}-polling",
+                daemon=True,
+            )
+            self._polling_thread.start()
 
         logging.info(
             f"Initialized OpenWeatherMap API with key {api_key} (mode: {self.mode})"
@@ -59,31 +105,81 @@ class OpenWeatherMap(metaclass=SingletonMeta):
         """
         Deletes the instance from the class-level dictionary of instances.
 
+        Stops the polling thread if the instance runs in 'polling' mode, waits for its current update,
+        and waits until all queued cache entries are written to the file.
+
         Returns:
             None
         """
+        self._stop_polling.set()
+        if self._polling_thread is not None:
+            self._polling_thread.join()
+        self._write_queue.put(None)
+        self._writer_thread.join()
         if self.api_key in self.__class__._instances:
             del self.__class__._instances[self.api_key]
 
-    def _load_cache(self) -> dict:
+    def _load_cache(self) -> OrderedDict:
         """
         Loads cache data from a file.
+
+        Each line of the file holds one city entry; a later line for the same city replaces the earlier one,
+        and an eviction line (`{"city": ..., "evicted": true}`) removes the city.
+        Corrupted lines are skipped and only the `cache_limit` most recently written cities are kept.
+        If there is no cache file yet, an empty cache is returned without opening it.
+        The file is memory-mapped and each line is parsed by orjson directly from bytes.
         Returns:
-            dict: A dictionary containing cache data loaded from the file.
+            OrderedDict: A dictionary containing cache data loaded from the file, least recently written city first.
         """
 
+        cache_data = OrderedDict()
+        if not os.path.exists(self.file_name):
+            self._cache_lines = 0
+            return cache_data
+        line_count = 0
         try:
-            with open(self.file_name, "r") as file:
-                cache_data = json.load(file)
-                for city, data in cache_data.items():
-                    data["time"] = datetime.fromisoformat(data["time"])
-                return cache_data
-        except (FileNotFoundError, json.decoder.JSONDecodeError):
-            return dict()
+            with open(self.file_name, "rb") as file, mmap.mmap(
+                file.fileno(), 0, access=mmap.ACCESS_READ
+            ) as mapped:
+                for line in iter(mapped.readline, b""):
+                    line_count += 1
+                    try:
+                        record = orjson.loads(line)
+                        city = record["city"]
+                        if record.get("evicted"):
+                            cache_data.pop(city, None)
+                            continue
+                        entry = WeatherEntry(
+                            time=int(record["time"]), data=record["data"]
+                        )
+                    except (
+                        orjson.JSONDecodeError,
+                        KeyError,
+                        TypeError,
+                        ValueError,
+                        AttributeError,
+                    ):
+                        continue
+                    cache_data[city] = entry
+                    cache_data.move_to_end(city)
+        except FileNotFoundError:
+            self._cache_lines = 0
+            return cache_data
+        except ValueError:
+            # An empty file cannot be memory-mapped
+            pass
+
+        while len(cache_data) > self.cache_limit:
+            cache_data.popitem(last=False)
+        self._cache_lines = line_count
+        return cache_data
 
     def _save_cache(self, cache_data: dict) -> None:
         """
-        Saves cache data to a file.
+        Saves cache data to a file, replacing its previous content.
+
+        The entries are copied and serialized before the file is opened, so the cache data is never modified
+        and can be updated by other threads while it is being saved.
         Args:
             cache_data (dict): A dictionary containing cache data to be saved.
 
@@ -91,17 +187,116 @@ class OpenWeatherMap(metaclass=SingletonMeta):
             None
         """
 
-        for city, data in cache_data.items():
-            if isinstance(data["time"], str):
-                data["time"] = datetime.fromisoformat(data["time"])
-            data["time"] = data["time"].isoformat()
-        with open(self.file_name, "w") as file:
-            json.dump(cache_data, file)
+        entries = list(cache_data.items())
+        payload = self._dump_cache_entries(entries)
+        with open(self.file_name, "wb") as file:
+            file.write(payload)
+        self._cache_lines = len(entries)
+
+    def _append_cache(self, cache_data: dict) -> None:
+        """
+        Appends cache entries to the cache file.
+
+        The file is compacted with _save_cache instead once it would hold more than twice `cache_limit` lines.
+        Args:
+            cache_data (dict): A dictionary containing cache entries to be appended.
+
+        Returns:
+            None
+        """
+
+        if self._cache_lines + len(cache_data) > 2 * self.cache_limit:
+            self._save_cache(self._cache)
+            return
+        entries = list(cache_data.items())
+        payload = self._dump_cache_entries(entries)
+        with open(self.file_name, "ab") as file:
+            file.write(payload)
+        self._cache_lines += len(entries)
+
+    def _queue_cache_write(self, cache_data: dict) -> None:
+        """
+        Queues cache entries to be written to the cache file by the writer thread.
+
+        Args:
+            cache_data (dict): A dictionary mapping city names to the WeatherEntry objects to be saved,
+                or to None for evicted cities.
+
+        Returns:
+            None
+        """
+
+        self._write_queue.put_nowait(cache_data)
+
+    def _write_cache_thread(self) -> None:
+        """
+        Writes queued cache entries to the cache file until the instance is deleted.
+
+        All entries queued since the previous write are appended at once,
+        keeping only the latest entry of each city.
+        A failed write is logged and the thread continues with the next entries.
+
+        Returns:
+            None
+        """
+
+        stopped = False
+        while not stopped:
+            items = [self._write_queue.get()]
+            while True:
+                try:
+                    items.append(self._write_queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            pending = dict()
+            for item in items:
+                if item is None:
+                    stopped = True
+                    continue
+                for city, data in item.items():
+                    pending.pop(city, None)
+                    pending[city] = data
+            if pending:
+                try:
+                    self._append_cache(pending)
+                except Exception:
+                    logging.exception("Error saving weather cache")
+            for _ in items:
+                self._write_queue.task_done()
+
+    @staticmethod
+    def _dump_cache_entries(entries: list) -> bytes:
+        """
+        Serializes cache entries to the on-disk format, one JSON line per city.
+
+        A city whose entry is None is written as an eviction line.
+        Args:
+            entries (list): (city, WeatherEntry or None) pairs.
+
+        Returns:
+            bytes: The JSON lines, each terminated with a newline.
+        """
+
+        return b"".join(
+            orjson.dumps(
+                (
+                    {"city": city, "evicted": True}
+                    if entry is None
+                    else {"city": city, "time": entry.time, "data": entry.data}
+                ),
+                option=orjson.OPT_APPEND_NEWLINE,
+            )
+            for city, entry in entries
+        )
 
     def get_weather(self, city: str) -> dict:
         """
         Retrieves weather data for the specified city.
 
+        Cached weather data is returned while it is less than 10 minutes old,
+        otherwise it is requested from OpenWeather in both modes.
+
         Args:
             city (str): The name of the city for which to get weather data.
 
@@ -113,73 +308,109 @@ class OpenWeatherMap(metaclass=SingletonMeta):
             ValueError: If the mode is unknown.
         """
 
-        now = datetime.now()
-
-        if city in self._cache:
-            cached_time = (
-                self._cache[city]["time"]
-                if isinstance(self._cache[city]["time"], datetime)
-                else datetime.fromisoformat(self._cache[city]["time"])
-            )
-            if now - cached_time < timedelta(minutes=10):
-                logging.debug(f"Using cached weather data for {city}")
-                return self._cache[city]["data"]
-
-        elif city not in self._cache:
-            if len(self._cache) >= self.cache_limit:
-
-                oldest_city = min(self._cache, key=lambda k: self._cache[k]["time"])
-                del self._cache[oldest_city]
-
-            self._cache[city] = {"time": datetime.now(), "data": {}}
-            self._save_cache(self._cache)
-
-        if self.mode == self.__ON_DEMAND:
-            weather_data = self._get_weather_on_demand(city, key=self.api_key)
-            self._cache[city] = {"time": datetime.now(), "data": weather_data}
-            self._save_cache(self._cache)
-            logging.info(f"Retrieved weather data for {city}")
+        now = time.time()
+
+        with self._cache_lock:
+            entry = self._cache.get(city)
+            if entry is not None:
+                self._cache.move_to_end(city)
+        if entry is not None and now - entry.time < self._TTL_SECONDS:
+            logging.debug(f"Using cached weather data for {city}")
+            return entry.data
+
+        weather_data = self._get_weather_on_demand(city, key=self.api_key)
+        entry = WeatherEntry(time=int(now), data=weather_data)
+        cache_update = dict()
+        with self._cache_lock:
+            if city not in self._cache and len(self._cache) >= self.cache_limit:
+                evicted_city, _ = self._cache.popitem(last=False)
+                cache_update[evicted_city] = None
+            self._cache[city] = entry
+        cache_update[city] = entry
+        self._queue_cache_write(cache_update)
+        logging.info(f"Retrieved weather data for {city}")
 
-            return weather_data
+        return weather_data
 
     def _update_weather_thread(self) -> None:
         """
-        Continuously updates weather data for cities in the cache using concurrent threads.
+        Continuously updates weather data for cities in the cache.
 
-        Uses a ThreadPoolExecutor to asynchronously update weather data for each city in the cache.
-        The weather data is retrieved using the _get_weather_on_demand method.
-        The cache is updated with the latest weather data for each city.
-        The updated cache is saved to the file.
+        Runs on the dedicated polling thread started in 'polling' mode and sleeps between updates.
+        Each update is done by the _update_weather method; an error during an update is logged
+        and polling continues with the next update.
 
-        The method runs indefinitely and updates the weather data every 10 minutes (600 seconds).
+        The method updates the weather data every 10 minutes (600 seconds) until the instance is deleted.
 
         Returns:
             None
         """
 
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            while True:
-                futures = [
-                    executor.submit(
-                        lambda c: self._get_weather_on_demand(c, self.api_key), city
-                    )
-                    for city in self._cache.keys()
-                ]
-                for future in concurrent.futures.as_completed(futures):
+        while not self._stop_polling.is_set():
+            try:
+                self._update_weather()
+            except Exception:
+                logging.exception("Error updating weather data in polling mode")
+
+            self._stop_polling.wait(self._TTL_SECONDS)
+
+    def _update_weather(self) -> None:
+        """
+        Updates weather data for all cities in the cache once.
 
-                    result = future.result()
-                    city = result["name"]
+        Cities whose OpenWeather ID is known from a previous request are updated with the
+        _get_weather_group method, up to `_GROUP_LIMIT` cities per request.
+        The other cities are updated one after another using the _get_weather_on_demand method.
+        Both reuse the keep-alive connection of the pooled HTTP session.
+        The cache is updated with the latest weather data for each city
+        and the updated cities are queued to be written to the cache file at once.
 
-                    self._cache[city] = {"time": datetime.now(), "data": result}
-                    self._save_cache(self._cache)
+        Returns:
+            None
+        """
 
-                time.sleep(60 * 10)
+        results = dict()
+        city_to_id = dict()
+        for city, entry in list(self._cache.items()):
+            city_id = (entry.data or {}).get("id")
+            if city_id is not None:
+                city_to_id[city] = city_id
+            elif not self._stop_polling.is_set():
+                results[city] = self._get_weather_on_demand(city, key=self.api_key)
+
+        cities = list(city_to_id)
+        for start in range(0, len(cities), self._GROUP_LIMIT):
+            if self._stop_polling.is_set():
+                break
+            batch = cities[start : start + self._GROUP_LIMIT]
+            group_weather = self._get_weather_group(
+                [city_to_id[city] for city in batch], key=self.api_key
+            )
+            for city in batch:
+                results[city] = (group_weather or {}).get(city_to_id[city])
+
+        updated_time = int(time.time())
+        updated_entries = dict()
+        with self._cache_lock:
+            for city, result in results.items():
+                if result is None or city not in self._cache:
+                    continue
+                entry = WeatherEntry(time=updated_time, data=result)
+                self._cache[city] = entry
+                updated_entries[city] = entry
+        if updated_entries:
+            self._queue_cache_write(updated_entries)
 
     @classmethod
+    @lru_cache(maxsize=256)
     def _get_url(cls, city: str, key: str) -> str:
         """
         Constructs the URL for making API requests to OpenWeather.
 
+        The city name and the API key are URL-encoded.
+        URLs are memoized, so repeated requests for the same city reuse the same string.
+        Call it with positional arguments: lru_cache keys keyword calls separately.
+
         Args:
             city (str): The name of the city for which to get weather data.
             key (str): Your OpenWeather API key.
@@ -189,9 +420,34 @@ class OpenWeatherMap(metaclass=SingletonMeta):
 
         """
 
-        """Getting ulr for api requests"""
-        url = f"https://api.openweathermap.org/data/2.5/weather?q={city}&appid={key}"
-        return url
+        return f"{cls._URL_PREFIX}{quote_plus(city)}&appid={quote(str(key), safe='')}"
+
+    @classmethod
+    def _get_session(cls) -> requests.Session:
+        """
+        Returns the HTTP session shared by all API requests, creating it on first use.
+
+        The session keeps connections to OpenWeather alive between requests and retries
+        transient server errors with a short backoff.
+
+        Returns:
+            requests.Session: The shared HTTP session.
+        """
+
+        if cls._session is None:
+            retries = Retry(
+                total=3,
+                backoff_factor=0.2,
+                status_forcelist=[429, 500, 502, 503, 504],
+                raise_on_status=False,
+            )
+            adapter = HTTPAdapter(
+                pool_connections=16, pool_maxsize=64, max_retries=retries
+            )
+            session = requests.Session()
+            session.mount("https://", adapter)
+            cls._session = session
+        return cls._session
 
     @classmethod
     def _get_weather_on_demand(cls, city: str, key: str) -> dict or None:
@@ -207,56 +463,128 @@ class OpenWeatherMap(metaclass=SingletonMeta):
 
         """
 
+        url = cls._get_url(city, key)
+        current_weather = cls._request_weather(url, description=city)
+        if current_weather is None:
+            return None
+        return cls._parse_weather(current_weather, description=city)
+
+    @classmethod
+    def _get_weather_group(cls, city_ids: list, key: str) -> dict or None:
+        """
+        Retrieves weather data for several cities with a single request to the OpenWeather group endpoint.
+
+        Each city is parsed separately, so a city with invalid data is left out without dropping the others.
+
+        Args:
+            city_ids (list): OpenWeather city IDs, no more than `_GROUP_LIMIT` of them.
+            key (str): Your OpenWeather API key.
+
+        Returns:
+            dict or None: A dictionary mapping each city ID to its weather data on success, or None on error.
+
+        """
+
+        ids = ",".join(str(city_id) for city_id in city_ids)
+        url = f"{cls._GROUP_URL_PREFIX}{ids}&appid={quote(str(key), safe='')}"
+        group_weather = cls._request_weather(url, description=f"city IDs {ids}")
+        if group_weather is None:
+            return None
+        try:
+            group_list = list(group_weather["list"])
+        except (KeyError, TypeError) as e:
+            logging.error(f"Invalid weather data received for city IDs {ids}: {e}")
+            return None
+
+        weather_data = dict()
+        for current_weather in group_list:
+            city_id = (
+                current_weather.get("id") if isinstance(current_weather, dict) else None
+            )
+            data = cls._parse_weather(current_weather, description=f"city ID {city_id}")
+            if city_id is not None and data is not None:
+                weather_data[city_id] = data
+        return weather_data
+
+    @classmethod
+    def _request_weather(cls, url: str, description: str) -> dict or None:
+        """
+        Sends an API request to OpenWeather and decodes the JSON response.
+
+        Args:
+            url (str): The URL for the API request.
+            description (str): What is requested, used in error messages.
+
+        Returns:
+            dict or None: The decoded response on success, or None on error.
+
+        """
+
         try:
 
-            url = cls._get_url(city=city, key=key)
-            weather_request = requests.get(url)
+            weather_request = cls._get_session().get(url, timeout=(3.05, 10))
             weather_request.raise_for_status()
-            current_weather = weather_request.json()
+            return orjson.loads(weather_request.content)
 
         except requests.exceptions.HTTPError as e:
-            if e.response.status_code == 401:
-                logging.error("Error 401: Unauthorized API request")
-            elif e.response.status_code == 404:
-                logging.error(
-                    "Error 404: City not found or incorrect API request format"
-                )
-            elif e.response.status_code == 429:
-                logging.error(
-                    "Error 429: Too many requests, consider upgrading your subscription or reducing API calls"
-                )
-            elif e.response.status_code in [500, 502, 503, 504]:
-                logging.error(
-                    f"Error {e.response.status_code}: Server error, please contact support"
-                )
-            else:
-                logging.error(f"Unhandled HTTP error: {e}")
+            message = cls._ERROR_MESSAGES.get(e.response.status_code)
+            logging.error(message or f"Unhandled HTTP error: {e}")
 
             return None
 
         except requests.exceptions.RequestException as e:
-            logging.error(f"Error fetching weather data for {city}: {e}")
+            logging.error(f"Error fetching weather data for {description}: {e}")
             return None
 
-        weather_data = {
-            "weather": {
-                "main": current_weather["weather"][0]["main"],
-                "description": current_weather["weather"][0]["description"],
-            },
-            "temperature": {
-                "temp": current_weather["main"]["temp"],
-                "feels_like": current_weather["main"]["feels_like"],
-            },
-            "visibility": current_weather["visibility"],
-            "wind": {
-                "speed": current_weather["wind"]["speed"],
-            },
-            "datetime": current_weather["dt"],
-            "sys": {
-                "sunrise": current_weather["sys"]["sunrise"],
-                "sunset": current_weather["sys"]["sunset"],
-            },
-            "timezone": current_weather["timezone"],
-            "name": current_weather["name"],
-        }
+        except orjson.JSONDecodeError as e:
+            logging.error(f"Invalid weather data received for {description}: {e}")
+            return None
+
+    @classmethod
+    def _parse_weather(cls, current_weather: dict, description: str) -> dict or None:
+        """
+        Extracts the weather data returned by the SDK from an OpenWeather API response.
+
+        Only the fields returned by the SDK are read; each nested object is looked up once.
+        'visibility' is optional, as OpenWeather omits it for some cities.
+
+        Args:
+            current_weather (dict): The current weather of one city as returned by OpenWeather.
+            description (str): What was requested, used in error messages.
+
+        Returns:
+            dict or None: A dictionary containing weather data, or None if required fields are missing.
+
+        """
+
+        try:
+            weather = current_weather["weather"][0]
+            main = current_weather["main"]
+            sys_data = current_weather["sys"]
+            weather_data = {
+                "weather": {
+                    "main": weather["main"],
+                    "description": weather["description"],
+                },
+                "temperature": {
+                    "temp": main["temp"],
+                    "feels_like": main["feels_like"],
+                },
+                "visibility": current_weather.get("visibility"),
+                "wind": {
+                    "speed": current_weather["wind"]["speed"],
+                },
+                "datetime": current_weather["dt"],
+                "sys": {
+                    "sunrise": sys_data["sunrise"],
+                    "sunset": sys_data["sunset"],
+                },
+                # The group endpoint reports the timezone inside "sys"
+                "timezone": current_weather.get("timezone", sys_data.get("timezone")),
+                "name": current_weather["name"],
+                "id": current_weather.get("id"),
+            }
+        except (KeyError, IndexError, TypeError, AttributeError) as e:
+            logging.error(f"Invalid weather data received for {description}: {e}")
+            return None
         return weather_data
@@ -1,3 +1,7 @@
+import inspect
+import threading
+
+
 class DuplicateClassError(Exception):
     """Exception raised when trying to create another copies of an object with the same key."""
 
@@ -8,11 +12,15 @@ class SingletonMeta(type):
     """Metaclass to limit the creation of copies."""
 
     _instances = {}
+    _lock = threading.Lock()
 
     def __call__(cls, *args, **kwargs):
         """
         Override the __call__ method to enforce singleton pattern and prevent duplicate instances.
 
+        The key is resolved from the `api_key` argument whether it is passed positionally or by keyword.
+        Creating the instance is guarded by a lock, so two threads cannot create copies with the same key.
+
         Args:
             cls (type): The class being instantiated.
             *args: Positional arguments passed to the class constructor.
@@ -24,9 +32,13 @@ class SingletonMeta(type):
         Returns:
             object: The singleton instance of the class.
         """
-        key = kwargs.get("api_key")
+        bound = inspect.signature(cls.__init__).bind_partial(None, *args, **kwargs)
+        key = bound.arguments.get("api_key")
         if key in cls._instances:
             raise DuplicateClassError(f"An instance for key '{key}' already exists")
-        instance = super().__call__(*args, **kwargs)
-        cls._instances[key] = instance
+        with cls._lock:
+            if key in cls._instances:
+                raise DuplicateClassError(f"An instance for key '{key}' already exists")
+            instance = super().__call__(*args, **kwargs)
+            cls._instances[key] = instance
         return instance
@@ -0,0 +1,11 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class WeatherEntry:
+    """Cached weather data of a city together with the time it was retrieved."""
+
+    __slots__ = ("time", "data")
+
+    time: int
+    data: dict or None
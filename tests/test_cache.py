@@ -1,6 +1,8 @@
 from conf import API_KEY
 from sdk_classes.class_sdk_weather import OpenWeatherMap
+from sdk_classes.weather_entry import WeatherEntry
 import unittest
+from unittest.mock import patch
 
 import json
 
@@ -18,7 +20,7 @@ class TestSaveCache(unittest.TestCase):
         """
         self.cache_data = {
             "New York": {
-                "time": "2024-03-09T19:44:09.584723",
+                "time": 1710009849,
                 "data": {
                     "weather": {"main": "Haze", "description": "haze"},
                     "temperature": {"temp": 278.65, "feels_like": 274.06},
@@ -36,14 +38,15 @@ class TestSaveCache(unittest.TestCase):
 
         self.weather_instance = OpenWeatherMap(api_key=self.api_key, mode=self.mode)
         with open(self.weather_instance.file_name, "w") as file:
-            json.dump(self.cache_data, file)
+            for city, data in self.cache_data.items():
+                file.write(json.dumps({"city": city, **data}) + "\n")
 
     def tearDown(self):
         """
         Clean up after each test by removing the cache file and deleting the instance.
         """
-        os.remove(self.weather_instance.file_name)
         self.weather_instance.delete_instance()
+        os.remove(self.weather_instance.file_name)
 
     def test_load_cache_existing_file(self):
         """
@@ -51,13 +54,44 @@ class TestSaveCache(unittest.TestCase):
         """
         loaded_cache_data = self.weather_instance._load_cache()
         expected_time = self.cache_data["New York"]["time"]
-        actual_time = loaded_cache_data["New York"]["time"].strftime(
-            "%Y-%m-%dT%H:%M:%S.%f"
-        )
+        actual_time = loaded_cache_data["New York"].time
         self.assertEqual(actual_time, expected_time)
         expected_data = self.cache_data["New York"]["data"]
-        actual_data = loaded_cache_data["New York"]["data"]
+        actual_data = loaded_cache_data["New York"].data
         self.assertEqual(expected_data, actual_data)
+        self.assertFalse(hasattr(loaded_cache_data["New York"], "__dict__"))
+
+    def test_load_cache_legacy_time(self):
+        """
+        Test loading cache data with a time stored in the legacy ISO 8601 format.
+        """
+        with open(self.weather_instance.file_name, "w") as file:
+            file.write(
+                json.dumps(
+                    {"city": "New York", "time": "2024-03-09T19:44:09", "data": {}}
+                )
+            )
+        loaded_cache_data = self.weather_instance._load_cache()
+        self.assertEqual(loaded_cache_data, {})
+
+    def test_load_cache_missing_file(self):
+        """
+        Test loading cache data when there is no cache file.
+        """
+        os.remove(self.weather_instance.file_name)
+        with patch("builtins.open") as mock_open:
+            loaded_cache_data = self.weather_instance._load_cache()
+        mock_open.assert_not_called()
+        self.assertEqual(loaded_cache_data, {})
+        open(self.weather_instance.file_name, "w").close()
+
+    def test_load_cache_empty_file(self):
+        """
+        Test loading cache data from an empty file.
+        """
+        open(self.weather_instance.file_name, "w").close()
+        loaded_cache_data = self.weather_instance._load_cache()
+        self.assertEqual(loaded_cache_data, {})
 
     def test_load_cache_corrupted_file(self):
         """
@@ -72,13 +106,92 @@ class TestSaveCache(unittest.TestCase):
         """
         Test saving cache data to a file.
         """
-        self.weather_instance._save_cache(self.cache_data)
+        self.weather_instance._save_cache(
+            {
+                city: WeatherEntry(time=data["time"], data=data["data"])
+                for city, data in self.cache_data.items()
+            }
+        )
         self.assertTrue(os.path.exists(self.weather_instance.file_name))
         with open(self.weather_instance.file_name, "r") as file:
-            saved_cache_data = json.load(file)
+            saved_cache_data = {}
+            for line in file:
+                record = json.loads(line)
+                saved_cache_data[record.pop("city")] = record
         self.assertEqual(saved_cache_data, self.cache_data)
 
-    def test_cache_overflow(self):
+    def test_save_cache_invalid_data(self):
+        """
+        Test saving cache data that cannot be serialized keeps the previous file content.
+        """
+        with self.assertRaises(TypeError):
+            self.weather_instance._save_cache(
+                {"New York": WeatherEntry(time=1710009849, data={"New York"})}
+            )
+        loaded_cache_data = self.weather_instance._load_cache()
+        self.assertEqual(loaded_cache_data["New York"].time, 1710009849)
+
+    def test_append_cache(self):
+        """
+        Test appending a cache entry replaces the earlier entry of the same city on load.
+        """
+        self.weather_instance._cache = self.weather_instance._load_cache()
+        self.weather_instance._cache["New York"].data = {"name": "New York"}
+        self.weather_instance._append_cache(
+            {"New York": self.weather_instance._cache["New York"]}
+        )
+        with open(self.weather_instance.file_name, "r") as file:
+            self.assertEqual(len(file.readlines()), 2)
+        loaded_cache_data = self.weather_instance._load_cache()
+        self.assertEqual(loaded_cache_data["New York"].data, {"name": "New York"})
+
+    def test_append_cache_compaction(self):
+        """
+        Test the cache file is rewritten once it would hold more than twice the cache limit lines.
+        """
+        self.weather_instance._cache = self.weather_instance._load_cache()
+        for _ in range(2 * self.weather_instance.cache_limit):
+            self.weather_instance._append_cache(
+                {"New York": self.weather_instance._cache["New York"]}
+            )
+        with open(self.weather_instance.file_name, "r") as file:
+            self.assertLess(len(file.readlines()), self.weather_instance.cache_limit)
+
+    def test_queue_cache_write(self):
+        """
+        Test queued cache entries are written to the file by the writer thread.
+        """
+        self.weather_instance._cache["London"] = WeatherEntry(time=1710009849, data={})
+        self.weather_instance._queue_cache_write(
+            {"London": self.weather_instance._cache["London"]}
+        )
+        self.weather_instance.delete_instance()
+        loaded_cache_data = self.weather_instance._load_cache()
+        self.assertEqual(
+            loaded_cache_data["London"], self.weather_instance._cache["London"]
+        )
+
+    def test_write_cache_thread_survives_error(self):
+        """
+        Test the writer thread logs a failed write and keeps writing later entries.
+        """
+        entry = WeatherEntry(time=1710009849, data={"New York"})
+        with self.assertLogs(level="ERROR") as logs:
+            self.weather_instance._queue_cache_write({"New York": entry})
+            self.weather_instance._write_queue.join()
+        self.assertIn("Error saving weather cache", logs.output[0])
+        self.assertTrue(self.weather_instance._writer_thread.is_alive())
+
+        self.weather_instance._cache["London"] = WeatherEntry(time=1710009849, data={})
+        self.weather_instance._queue_cache_write(
+            {"London": self.weather_instance._cache["London"]}
+        )
+        self.weather_instance.delete_instance()
+        self.assertIn("London", self.weather_instance._load_cache())
+
+    @patch.object(OpenWeatherMap, "_get_weather_on_demand")
+    def test_cache_overflow(self, mock_get_weather):
+        mock_get_weather.side_effect = lambda city, key: {"name": city}
         cities = [
             "Minsk",
             "London",
@@ -98,3 +211,25 @@ class TestSaveCache(unittest.TestCase):
         self.assertEqual(
             len(self.weather_instance._cache), self.weather_instance.cache_limit
         )
+        self.assertNotIn("Minsk", self.weather_instance._cache)
+        self.assertIn("Rome", self.weather_instance._cache)
+        self.assertEqual(mock_get_weather.call_count, len(cities))
+
+    @patch.object(OpenWeatherMap, "_get_weather_on_demand")
+    def test_load_cache_after_eviction(self, mock_get_weather):
+        """
+        Test that reloading the cache after an eviction restores the cities held in memory.
+        """
+        mock_get_weather.side_effect = lambda city, key: {"name": city}
+        os.remove(self.weather_instance.file_name)
+        self.weather_instance._cache = self.weather_instance._load_cache()
+        cities = [f"City {i}" for i in range(self.weather_instance.cache_limit)]
+        for city in cities:
+            self.weather_instance.get_weather(city)
+        self.weather_instance.get_weather(cities[0])
+        self.weather_instance.get_weather("New City")
+        self.weather_instance.delete_instance()
+
+        loaded_cache_data = self.weather_instance._load_cache()
+        self.assertNotIn(cities[1], loaded_cache_data)
+        self.assertEqual(set(loaded_cache_data), set(self.weather_instance._cache))
@@ -1,7 +1,12 @@
+import json
 import os
+import time
 import unittest
+from unittest.mock import patch
+
 from conf import API_KEY
 from sdk_classes.class_sdk_weather import OpenWeatherMap
+from sdk_classes.weather_entry import WeatherEntry
 from sdk_classes.metaclass import DuplicateClassError
 
 
@@ -36,9 +41,9 @@ class TestOpenWeatherMap(unittest.TestCase):
         """
         Clean up after each test by deleting the instance.
         """
+        self.weather.delete_instance()
         if os.path.exists(self.weather.file_name):
             os.remove(self.weather.file_name)
-        self.weather.delete_instance()
 
     def test_get_weather(self):
         """
@@ -48,6 +53,21 @@ class TestOpenWeatherMap(unittest.TestCase):
             weather_data = self.weather.get_weather(city)
             self.assertIsNotNone(weather_data)
 
+    @patch.object(OpenWeatherMap, "_get_weather_on_demand")
+    def test_get_weather_cached(self, mock_get_weather):
+        """
+        Test that weather data is requested once and then returned from the cache.
+        """
+        mock_get_weather.return_value = {"name": self.city}
+        for _ in range(3):
+            weather_data = self.weather.get_weather(self.city)
+            self.assertEqual(weather_data, {"name": self.city})
+        mock_get_weather.assert_called_once_with(self.city, key=self.api_key)
+
+        self.weather._cache[self.city].time -= self.weather._TTL_SECONDS
+        self.weather.get_weather(self.city)
+        self.assertEqual(mock_get_weather.call_count, 2)
+
     def test_get_url(self):
         """
         Test generating the URL for API requests.
@@ -56,6 +76,30 @@ class TestOpenWeatherMap(unittest.TestCase):
         self.assertIsNotNone(url)
         self.assertEqual(url, self.url)
 
+    @patch.object(OpenWeatherMap, "_request_weather", return_value=None)
+    def test_get_url_memoized(self, mock_request):
+        """
+        Test that repeated requests for the same city reuse the memoized URL.
+        """
+        OpenWeatherMap._get_url.cache_clear()
+        for _ in range(2):
+            self.weather._get_weather_on_demand(self.city, key=self.api_key)
+
+        cache_info = OpenWeatherMap._get_url.cache_info()
+        self.assertEqual((cache_info.misses, cache_info.hits), (1, 1))
+        urls = [call.args[0] for call in mock_request.call_args_list]
+        self.assertIs(urls[0], urls[1])
+
+    def test_get_url_encoding(self):
+        """
+        Test that the city name is URL-encoded.
+        """
+        url = self.weather._get_url("Rio de Janeiro", self.api_key)
+        self.assertEqual(
+            url,
+            f"https://api.openweathermap.org/data/2.5/weather?q=Rio+de+Janeiro&appid={self.api_key}",
+        )
+
     def test__get_weather_on_demand(self):
         """
         Test retrieving weather data in on-demand mode.
@@ -86,3 +130,114 @@ class TestOpenWeatherMap(unittest.TestCase):
     def test_duplicate_copies(self):
         with self.assertRaises(DuplicateClassError):
             _ = OpenWeatherMap(api_key=self.api_key, mode=self.mode)
+
+    def test_polling_mode_runs_in_background(self):
+        """
+        Test that polling mode starts a background thread and stops it on delete.
+        """
+        self.weather.delete_instance()
+        self.weather = OpenWeatherMap(api_key=self.api_key, mode="polling")
+        self.assertTrue(self.weather._polling_thread.is_alive())
+        self.weather.delete_instance()
+        self.weather._polling_thread.join(timeout=5)
+        self.assertFalse(self.weather._polling_thread.is_alive())
+
+    def test_duplicate_copies_positional_key(self):
+        with self.assertRaises(DuplicateClassError):
+            _ = OpenWeatherMap(self.api_key, self.mode)
+
+    @patch.object(OpenWeatherMap, "_get_weather_on_demand")
+    def test_polling_mode_updates_cache(self, mock_get_weather):
+        """
+        Test that polling mode updates all cached cities and saves them to the file.
+        """
+        self.weather.delete_instance()
+        mock_get_weather.side_effect = lambda city, key: {"name": city.upper()}
+        with open(self.weather.file_name, "w") as file:
+            for city in self.cities[:3]:
+                file.write(json.dumps({"city": city, "time": 0, "data": {}}) + "\n")
+
+        self.weather = OpenWeatherMap(api_key=self.api_key, mode="polling")
+        for _ in range(50):
+            if all(entry.time for entry in self.weather._cache.values()):
+                break
+            time.sleep(0.1)
+        self.weather.delete_instance()
+
+        self.assertEqual(mock_get_weather.call_count, 3)
+        loaded_cache_data = self.weather._load_cache()
+        self.assertEqual(list(loaded_cache_data), self.cities[:3])
+        for city in self.cities[:3]:
+            self.assertEqual(loaded_cache_data[city].data, {"name": city.upper()})
+
+    @patch.object(OpenWeatherMap, "_get_weather_group")
+    @patch.object(OpenWeatherMap, "_get_weather_on_demand")
+    def test_polling_mode_uses_group_endpoint(
+        self, mock_get_weather, mock_get_weather_group
+    ):
+        """
+        Test that polling mode updates cities with a known ID with one group request.
+        """
+        self.weather.delete_instance()
+        mock_get_weather.side_effect = lambda city, key: {"name": city}
+        mock_get_weather_group.side_effect = lambda city_ids, key: {
+            city_id: {"name": "Updated", "id": city_id} for city_id in city_ids
+        }
+        with open(self.weather.file_name, "w") as file:
+            for city_id, city in enumerate(self.cities[:3]):
+                data = {"name": city, "id": city_id}
+                file.write(json.dumps({"city": city, "time": 0, "data": data}) + "\n")
+            file.write(json.dumps({"city": "Rome", "time": 0, "data": None}) + "\n")
+
+        self.weather = OpenWeatherMap(api_key=self.api_key, mode="polling")
+        for _ in range(50):
+            if all(entry.time for entry in self.weather._cache.values()):
+                break
+            time.sleep(0.1)
+        self.weather.delete_instance()
+
+        mock_get_weather_group.assert_called_once_with([0, 1, 2], key=self.api_key)
+        mock_get_weather.assert_called_once_with("Rome", key=self.api_key)
+        for city in self.cities[:3]:
+            self.assertEqual(self.weather._cache[city].data["name"], "Updated")
+
+    @patch("sdk_classes.class_sdk_weather.requests.Session.get")
+    def test_polling_mode_survives_malformed_response(self, mock_get):
+        """
+        Test that a malformed API response does not stop the polling thread.
+        """
+        self.weather.delete_instance()
+        mock_get.return_value.content = b'{"name": "Vilnius"}'
+        with open(self.weather.file_name, "w") as file:
+            file.write(json.dumps({"city": self.city, "time": 0, "data": {}}) + "\n")
+
+        self.weather = OpenWeatherMap(api_key=self.api_key, mode="polling")
+        for _ in range(50):
+            if mock_get.called:
+                break
+            time.sleep(0.1)
+        time.sleep(0.1)
+
+        self.assertTrue(mock_get.called)
+        self.assertTrue(self.weather._polling_thread.is_alive())
+
+    @patch.object(OpenWeatherMap, "_get_weather_on_demand")
+    def test_update_weather_skips_evicted_city(self, mock_get_weather):
+        """
+        Test that a city evicted during a polling update is not added back to the cache.
+        """
+        for city in self.cities[:2]:
+            self.weather._cache[city] = WeatherEntry(time=0, data={})
+
+        def evict_first_city(city, key):
+            self.weather._cache.pop(self.cities[0], None)
+            return {"name": city}
+
+        mock_get_weather.side_effect = evict_first_city
+        with patch.object(self.weather, "_queue_cache_write") as mock_queue:
+            self.weather._update_weather()
+
+        self.assertEqual(list(self.weather._cache), [self.cities[1]])
+        queued = mock_queue.call_args.args[0]
+        self.assertEqual(list(queued), [self.cities[1]])
+        self.assertIs(queued[self.cities[1]], self.weather._cache[self.cities[1]])
@@ -1,6 +1,7 @@
 import unittest
 from unittest.mock import patch
 
+import orjson
 import requests
 
 from conf import API_KEY
@@ -27,7 +28,7 @@ class TestOpenWeatherMap(unittest.TestCase):
         """
         self.weather.delete_instance()
 
-    @patch("sdk_classes.class_sdk_weather.requests.get")
+    @patch("sdk_classes.class_sdk_weather.requests.Session.get")
     def test_get_weather_on_demand_success(self, mock_get):
         """
         Test successful weather data retrieval.
@@ -46,14 +47,117 @@ class TestOpenWeatherMap(unittest.TestCase):
             "timezone": -18000,
             "name": "New York",
         }
-        mock_get.return_value.json.return_value = mock_response
+        mock_get.return_value.content = orjson.dumps(mock_response)
 
         weather_data = self.weather._get_weather_on_demand(self.city, self.api_key)
 
         self.assertIsNotNone(weather_data)
         self.assertEqual(weather_data["weather"]["main"], "Clouds")
 
-    @patch("sdk_classes.class_sdk_weather.requests.get")
+    @patch("sdk_classes.class_sdk_weather.requests.Session.get")
+    def test_get_weather_group_success(self, mock_get):
+        """
+        Test successful weather data retrieval for several cities with one request.
+
+        Mocks a successful group API response and verifies that weather data is retrieved for each city.
+
+        """
+
+        mock_response = {
+            "cnt": 2,
+            "list": [
+                {
+                    "weather": [{"main": "Clouds", "description": "broken clouds"}],
+                    "main": {"temp": 20, "feels_like": 18},
+                    "visibility": 10000,
+                    "wind": {"speed": 3.5},
+                    "dt": 1646890800,
+                    "sys": {
+                        "sunrise": 1646851977,
+                        "sunset": 1646894477,
+                        "timezone": 0,
+                    },
+                    "id": 2643743,
+                    "name": "London",
+                },
+                {
+                    "weather": [{"main": "Clear", "description": "clear sky"}],
+                    "main": {"temp": 278.64, "feels_like": 274.4},
+                    "visibility": 10000,
+                    "wind": {"speed": 6.69},
+                    "dt": 1710168349,
+                    "sys": {
+                        "sunrise": 1710132202,
+                        "sunset": 1710173670,
+                        "timezone": 7200,
+                    },
+                    "id": 593116,
+                    "name": "Vilnius",
+                },
+            ],
+        }
+        mock_get.return_value.content = orjson.dumps(mock_response)
+
+        weather_data = self.weather._get_weather_group([2643743, 593116], self.api_key)
+
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertIn("group?id=2643743,593116&", mock_get.call_args.args[0])
+        self.assertEqual(weather_data[2643743]["name"], "London")
+        self.assertEqual(weather_data[593116]["weather"]["main"], "Clear")
+        self.assertEqual(weather_data[593116]["timezone"], 7200)
+
+    @patch("sdk_classes.class_sdk_weather.requests.Session.get")
+    def test_get_weather_on_demand_invalid_data_handling(self, mock_get):
+        """
+        Test handling of a response missing required weather fields.
+
+        Mocks a successful API response without weather fields and verifies that it is handled correctly.
+
+        """
+        mock_get.return_value.content = orjson.dumps({"name": self.city})
+
+        with self.assertLogs(level="ERROR") as logs:
+            weather_data = self.weather._get_weather_on_demand(self.city, self.api_key)
+
+        self.assertIsNone(weather_data)
+        self.assertIn(f"Invalid weather data received for {self.city}", logs.output[0])
+
+    @patch("sdk_classes.class_sdk_weather.requests.Session.get")
+    def test_get_weather_group_invalid_city_handling(self, mock_get):
+        """
+        Test handling of a group response with invalid data for one city.
+
+        Mocks a group API response where one city lacks weather fields and another lacks visibility,
+        and verifies that only the invalid city is left out.
+
+        """
+        mock_response = {
+            "cnt": 2,
+            "list": [
+                {"id": 2643743, "name": "London"},
+                {
+                    "weather": [{"main": "Clear", "description": "clear sky"}],
+                    "main": {"temp": 278.64, "feels_like": 274.4},
+                    "wind": {"speed": 6.69},
+                    "dt": 1710168349,
+                    "sys": {
+                        "sunrise": 1710132202,
+                        "sunset": 1710173670,
+                        "timezone": 7200,
+                    },
+                    "id": 593116,
+                    "name": "Vilnius",
+                },
+            ],
+        }
+        mock_get.return_value.content = orjson.dumps(mock_response)
+
+        weather_data = self.weather._get_weather_group([2643743, 593116], self.api_key)
+
+        self.assertEqual(list(weather_data), [593116])
+        self.assertIsNone(weather_data[593116]["visibility"])
+
+    @patch("sdk_classes.class_sdk_weather.requests.Session.get")
     def test_get_weather_on_demand_error_401_handling(self, mock_get):
         """
         Test handling of HTTP 401 error.
@@ -66,12 +170,14 @@ class TestOpenWeatherMap(unittest.TestCase):
         mock_response.status_code = 401
         mock_get.side_effect = requests.exceptions.HTTPError(response=mock_response)
 
-        weather_data = self.weather._get_weather_on_demand(self.city, key)
+        with self.assertLogs(level="ERROR") as logs:
+            weather_data = self.weather._get_weather_on_demand(self.city, key)
 
         self.assertIsNone(weather_data)
+        self.assertIn("Error 401: Unauthorized API request", logs.output[0])
         self.assertTrue(mock_get.called)
 
-    @patch("sdk_classes.class_sdk_weather.requests.get")
+    @patch("sdk_classes.class_sdk_weather.requests.Session.get")
     def test_get_weather_on_demand_error_404_handling(self, mock_get):
         """
         Test handling of HTTP 404 error.
@@ -90,7 +196,7 @@ class TestOpenWeatherMap(unittest.TestCase):
         self.assertIsNone(weather_data)
         self.assertTrue(mock_get.called)
 
-    @patch("sdk_classes.class_sdk_weather.requests.get")
+    @patch("sdk_classes.class_sdk_weather.requests.Session.get")
     def test_get_weather_on_demand_error_429_handling(self, mock_get):
         """
         Test handling of HTTP 429 error.
@@ -107,7 +213,7 @@ class TestOpenWeatherMap(unittest.TestCase):
         self.assertIsNone(weather_data)
         self.assertTrue(mock_get.called)
 
-    @patch("sdk_classes.class_sdk_weather.requests.get")
+    @patch("sdk_classes.class_sdk_weather.requests.Session.get")
     def test_get_weather_on_demand_error_500_handling(self, mock_get):
         """
         Test handling of HTTP 500 error.
@@ -126,7 +232,7 @@ class TestOpenWeatherMap(unittest.TestCase):
         self.assertIsNone(weather_data)
         self.assertTrue(mock_get.called)
 
-    @patch("sdk_classes.class_sdk_weather.requests.get")
+    @patch("sdk_classes.class_sdk_weather.requests.Session.get")
     def test_get_weather_on_demand_error_410_handling(self, mock_get):
         """
         Test handling of  any HTTP error.
@@ -145,7 +251,7 @@ class TestOpenWeatherMap(unittest.TestCase):
         self.assertIsNone(weather_data)
         self.assertTrue(mock_get.called)
 
-    @patch("sdk_classes.class_sdk_weather.requests.get")
+    @patch("sdk_classes.class_sdk_weather.requests.Session.get")
     def test_get_weather_on_demand_error_handling(self, mock_get):
         """
         Test handling of general request error.
@@ -162,3 +268,27 @@ class TestOpenWeatherMap(unittest.TestCase):
 
         self.assertIsNone(weather_data)
         self.assertTrue(mock_get.called)
+
+    @patch("sdk_classes.class_sdk_weather.requests.Session.get")
+    def test_get_weather_on_demand_invalid_json_handling(self, mock_get):
+        """
+        Test handling of a response body that is not valid JSON.
+
+        Mocks a successful API response with a corrupted body and verifies that it is handled correctly.
+
+        """
+        mock_get.return_value.content = b"corrupted_test_data"
+
+        weather_data = self.weather._get_weather_on_demand(self.city, self.api_key)
+
+        self.assertIsNone(weather_data)
+        self.assertTrue(mock_get.called)
+
+    def test_session_reused(self):
+        """
+        Test that all requests share a single HTTP session.
+        """
+        session = self.weather._get_session()
+
+        self.assertIs(session, OpenWeatherMap._get_session())
+        self.assertIn("https://", session.adapters)